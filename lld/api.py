@@ -1,7 +1,15 @@
 from fastapi import FastAPI
 from pydantic import BaseModel
 
-app = FastAPI()
+try:
+    import orjson  # noqa: F401  -- only used via ORJSONResponse
+    from fastapi.responses import ORJSONResponse as _default_response_class
+except ImportError:  # orjson is optional; stdlib json responses otherwise
+    from fastapi.responses import JSONResponse as _default_response_class
+
+# async handlers stay on the event loop instead of FastAPI's threadpool;
+# orjson serializes the small dict payloads ~5x faster than stdlib json
+app = FastAPI(default_response_class=_default_response_class)
 
 # Request body schema
 class UserCreate(BaseModel):
@@ -10,16 +18,22 @@ class UserCreate(BaseModel):
     email: str
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "ok"}
 
 @app.get("/users/{user_id}")
-def get_user(user_id:int):
+async def get_user(user_id: int):
     return {"user_id": user_id}
 
 @app.post("/users")
-def create_user(user: UserCreate):
+async def create_user(user: UserCreate):
     return {
         "message": "User created successfully",
         "user": user
-    }
\ No newline at end of file
+    }
+
+if __name__ == "__main__":
+    import uvicorn
+    # loop/http "auto" picks uvloop and httptools when installed and
+    # falls back to asyncio/h11 otherwise
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="auto", http="auto")
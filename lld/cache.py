@@ -1,45 +1,91 @@
-import hashlib
-from collections import OrderedDict
-import threading 
+import heapq
+import threading
+import time
+from functools import lru_cache
+
+@lru_cache(maxsize=1024)
+def _normalize(prompt):
+    # memoized so a get/set pair (or repeated queries) pays the O(n)
+    # split/join/lower walk only once per distinct prompt
+    return " ".join(prompt.split()).lower()
 
 class TTLCache:
+    # bump LRU recency only on every Nth hit; ordering is approximate but
+    # the common hit path stays lock-free
+    _MOVE_EVERY = 8
+
     def __init__(self, max_size):
         self.max_size = max_size
-        self.cache = OrderedDict()
+        # key -> (value, expiry, seq); plain dict keeps insertion order
+        # since 3.7 without OrderedDict's linked-list bookkeeping
+        self.cache = {}
+        # min-heap of (seq, key) with lazy deletion: stale entries are
+        # skipped at eviction time by comparing against the current seq
+        self._heap = []
+        self._seq = 0
         self.lock = threading.Lock()
+        self._hits = 0
 
     def _make_key(self, tenant_id, model, prompt):
-        normalized = " ".join(prompt.strip().split()).lower()
-        prompt_hash = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
-        return (tenant_id, model, prompt)
-    
+        # A tuple of primitives is already a valid dict key; string hashing
+        # goes through CPython's SipHash in C, no digest needed
+        return (tenant_id, model, _normalize(prompt))
+
+    def _evict_lru(self):
+        # pop stale heap entries until one matches the live seq for its key
+        while self._heap:
+            seq, key = heapq.heappop(self._heap)
+            entry = self.cache.get(key)
+            if entry is not None and entry[2] == seq:
+                del self.cache[key]
+                return
+
+    def _maybe_compact(self):
+        # lazy deletion only discards stale tuples during eviction, so
+        # overwrites and recency bumps would grow the heap forever;
+        # rebuild it from live entries once stale ones dominate
+        # (caller holds the lock)
+        if len(self._heap) > 2 * len(self.cache):
+            self._heap = [(entry[2], key) for key, entry in self.cache.items()]
+            heapq.heapify(self._heap)
+
     def set(self, tenant_id, model, prompt, value, ttl_seconds):
         expiry = time.time() + ttl_seconds
         key = self._make_key(tenant_id, model, prompt)
         with self.lock:
-            if key in self.cache:
-                self.cache.pop(key)
-            
-            elif len(self.cache) >= self.max_size:
-                self.cache.popitem(last = False) ## remove lru
+            self._seq += 1
+            self.cache[key] = (value, expiry, self._seq)
+            heapq.heappush(self._heap, (self._seq, key))
+            while len(self.cache) > self.max_size:
+                self._evict_lru()
+            self._maybe_compact()
 
-            self.cache[key] = (value, expiry)
-
-    def get(self, key):
+    def get(self, tenant_id, model, prompt):
         key = self._make_key(tenant_id, model, prompt)
-        with self.lock:
-            item = self.store.get(key)
-            if item is None:
-                return None
-            
-            value, expiry = self.cache[key]
-            if time.time() > expiry:
-                del self.store[key]
-                return -1
-            
-            self.cache.move_to_end(key)
-            return value
+        # snapshot read without the lock -- dict.get is atomic under the GIL
+        # and the hit-without-eviction case is by far the most frequent
+        item = self.cache.get(key)
+        if item is None:
+            return None
+
+        value, expiry, seq = item
+        if time.time() > expiry:
+            with self.lock:
+                if self.cache.get(key) is item:
+                    del self.cache[key]
+            return None
+
+        self._hits += 1
+        if self._hits % self._MOVE_EVERY == 0:
+            with self.lock:
+                if self.cache.get(key) is item:
+                    self._seq += 1
+                    self.cache[key] = (value, expiry, self._seq)
+                    heapq.heappush(self._heap, (self._seq, key))
+                    self._maybe_compact()
+        return value
 
     def delete(self, tenant_id, model, prompt):
         key = self._make_key(tenant_id, model, prompt)
-        self.cache.pop(key, None)
\ No newline at end of file
+        with self.lock:
+            self.cache.pop(key, None)
@@ -1,7 +1,19 @@
+import os
+import queue
+import sys
 import threading
+import time
+
+try:
+    import orjson
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:  # orjson is optional; stdlib json is the fallback
+    import json
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, separators=(",", ":"))
 from abc import ABC, abstractmethod
 from enum import IntEnum
-from datetime import datetime
 
 # --- 1. Model & Enums ---
 class LogLevel(IntEnum):
@@ -12,14 +24,31 @@ class LogLevel(IntEnum):
     ERROR = 4
     FATAL = 5
 
+# .name on an IntEnum is a descriptor lookup per access; resolve once
+_LEVEL_NAMES = {level: level.name for level in LogLevel}
+
 class LogMessage:
     """Matches LogMessage.java"""
     def __init__(self, level: LogLevel, message: str):
         self.level = level #
         self.message = message #
-        self.timestamp = int(datetime.now().timestamp() * 1000) # Long timestamp
+        # second resolution is all the formatters ever render, so store
+        # that directly -- no datetime object, no ms division downstream
+        self.timestamp_sec = int(time.time())
 
 # --- 2. Formatters (Strategy Pattern) ---
+# The formatted string only has second resolution, so a burst of messages
+# within the same second reuses the last strftime result
+_last_ts_sec = -1
+_last_ts_str = ""
+
+def _format_ts(sec: int) -> str:
+    global _last_ts_sec, _last_ts_str
+    if sec != _last_ts_sec:
+        _last_ts_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+        _last_ts_sec = sec
+    return _last_ts_str
+
 class LogFormatter(ABC):
     """Matches LogFormatter.java"""
     @abstractmethod
@@ -29,14 +58,18 @@ class LogFormatter(ABC):
 class PlainTextFormatter(LogFormatter):
     """Matches PlainTextFormatter.java"""
     def format(self, message: LogMessage) -> str:
-        dt = datetime.fromtimestamp(message.timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
-        return f"{dt} [{message.level.name}] - {message.message}" #
+        return f"{_format_ts(message.timestamp_sec)} [{_LEVEL_NAMES[message.level]}] - {message.message}" #
 
 class JsonFormatter(LogFormatter):
     """Matches JsonFormatter.java"""
     def format(self, message: LogMessage) -> str:
-        dt = datetime.fromtimestamp(message.timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
-        return f'{{"timestamp": "{dt}", "level": "{message.level.name}", "message": "{message.message}"}}' #
+        # real serialization: the old f-string output was invalid JSON
+        # whenever the message contained quotes or control characters
+        return _json_dumps({
+            "timestamp": _format_ts(message.timestamp_sec),
+            "level": _LEVEL_NAMES[message.level],
+            "message": message.message,
+        })
 
 # --- 3. Appenders (Observer Pattern) ---
 class LogAppender(ABC):
@@ -48,105 +81,160 @@ class LogAppender(ABC):
     def append(self, message: LogMessage):
         pass
 
+    def append_batch(self, messages):
+        """One formatted write per batch; subclasses override for a single
+        write() call instead of one per message."""
+        for message in messages:
+            self.append(message)
+
 class ConsoleAppender(LogAppender):
     def append(self, message: LogMessage):
         print(f"CONSOLE: {self.formatter.format(message)}")
 
+    def append_batch(self, messages):
+        lines = "\n".join(f"CONSOLE: {self.formatter.format(m)}" for m in messages)
+        sys.stdout.write(lines + "\n")
+        sys.stdout.flush()
+
 class FileAppender(LogAppender):
     def __init__(self, formatter: LogFormatter, file_name: str):
         super().__init__(formatter)
         self.file_name = file_name
+        # open once with a large buffer instead of a syscall per line
+        self._file = open(file_name, "a", buffering=1 << 16)
+        # on POSIX, writev submits the whole batch to the kernel in a
+        # single syscall instead of one write per flush
+        self._use_writev = hasattr(os, "writev")
 
     def append(self, message: LogMessage):
-        # In production, this would write to self.file_name
-        print(f"FILE ({self.file_name}): {self.formatter.format(message)}")
-
-# --- 4. Log Handlers (Chain of Responsibility + Thread Safety) ---
-class LogHandler(ABC):
-    """Matches LogHandler.java"""
-    def __init__(self):
-        self.next = None #
-        self.appenders = [] # Matches ArrayList/CopyOnWriteArrayList
-        self._lock = threading.Lock() # To handle concurrency safely like CopyOnWriteArrayList
-
-    def set_next(self, next_handler):
-        """Setter for the chain"""
-        self.next = next_handler
-        return next_handler
-
-    def subscribe(self, observer: LogAppender):
-        """Thread-safe subscribe"""
-        with self._lock:
-            self.appenders.append(observer) #
-
-    def notify_observers(self, message: LogMessage):
-        """Thread-safe iteration using a snapshot"""
-        with self._lock:
-            # We take a snapshot of the list to mimic CopyOnWriteArrayList behavior
-            current_appenders = list(self.appenders)
-        
-        for appender in current_appenders:
-            appender.append(message) #
-
-    def handle(self, message: LogMessage):
-        """Core CoR logic"""
-        if self.can_handle(message.level): #
-            self.notify_observers(message) #
-        
-        if self.next:
-            self.next.handle(message) #
+        self._file.write(self.formatter.format(message) + "\n")
 
-    @abstractmethod
-    def can_handle(self, level: LogLevel) -> bool:
-        pass
-
-class InfoHandler(LogHandler):
-    def can_handle(self, level: LogLevel): return level == LogLevel.INFO
+    def append_batch(self, messages):
+        if self._use_writev:
+            self._file.flush()  # keep ordering with any append() output
+            buffers = [(self.formatter.format(m) + "\n").encode() for m in messages]
+            fd = self._file.fileno()
+            # writev may write fewer bytes than submitted (ENOSPC,
+            # RLIMIT_FSIZE, signals); keep resubmitting the remainder
+            # instead of silently dropping the tail of the batch
+            while buffers:
+                written = os.writev(fd, buffers)
+                if written <= 0:
+                    raise OSError(f"writev wrote {written} bytes to {self.file_name}")
+                while buffers and written >= len(buffers[0]):
+                    written -= len(buffers[0])
+                    buffers.pop(0)
+                if written:
+                    buffers[0] = buffers[0][written:]
+        else:
+            self._file.write("\n".join(self.formatter.format(m) for m in messages) + "\n")
+            self._file.flush()
 
-class WarnHandler(LogHandler):
-    """Matches WarnHandler.java"""
-    def can_handle(self, level: LogLevel): return level == LogLevel.WARN #
+# --- 4. Level Dispatch & Configuration ---
+class LogHandlerConfiguration:
+    """Level -> appenders dispatch table.
 
-class ErrorHandler(LogHandler):
-    """Matches ErrorHandler.java"""
-    def can_handle(self, level: LogLevel): return level == LogLevel.ERROR #
+    Replaces the old handler chain (which walked every level per message)
+    with a single dict lookup. Mutations copy-and-swap the dict under the
+    lock so dispatch can read it without locking, mimicking
+    CopyOnWriteArrayList."""
+    _lock = threading.RLock()
+    _appenders_by_level: dict = {}
 
-# --- 5. Configuration & Entry Point ---
-class LogHandlerConfiguration:
-    """Matches LogHandlerConfiguration.java"""
-    _debug = InfoHandler() # Placeholder for Debug
-    _info = InfoHandler()
-    _warn = WarnHandler()
-    _error = ErrorHandler()
+    @classmethod
+    def add_appender_for_level(cls, level: LogLevel, appender: LogAppender):
+        """Assigns appender to specific level (copy-on-write)"""
+        with cls._lock:
+            table = dict(cls._appenders_by_level)
+            table[level] = table.get(level, []) + [appender]
+            cls._appenders_by_level = table
 
     @classmethod
-    def build(cls):
-        """Builds the chain"""
-        cls._info.set_next(cls._warn).set_next(cls._error) #
-        return cls._info
+    def dispatch(cls, message: LogMessage):
+        for appender in cls._appenders_by_level.get(message.level, ()):
+            appender.append(message)
 
     @classmethod
-    def add_appender_for_level(cls, level: LogLevel, appender: LogAppender):
-        """Assigns appender to specific level"""
-        if level == LogLevel.INFO: cls._info.subscribe(appender)
-        elif level == LogLevel.WARN: cls._warn.subscribe(appender)
-        elif level == LogLevel.ERROR: cls._error.subscribe(appender)
+    def dispatch_batch(cls, messages):
+        table = cls._appenders_by_level
+        by_level = {}
+        for message in messages:
+            if message.level in table:
+                by_level.setdefault(message.level, []).append(message)
+        for level, group in by_level.items():
+            for appender in table[level]:
+                appender.append_batch(group)
+
+class AsyncLogDispatcher:
+    """Decouples producers from appender IO: log() enqueues, a single
+    daemon thread drains and dispatches batches by level, so N messages
+    cost one write per appender instead of one each."""
+    BATCH_SIZE = 512
+    FLUSH_INTERVAL = 1.0  # seconds
+
+    def __init__(self, dispatch_batch, maxsize=8192):
+        self.dispatch_batch = dispatch_batch
+        self.queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, message: LogMessage):
+        self.queue.put(message)
+
+    def flush(self):
+        """Block until everything enqueued so far has been written"""
+        self.queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.FLUSH_INTERVAL
+            # drain greedily; once the queue runs dry, wait out the rest
+            # of the flush interval for stragglers to maximize batch size
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    pass
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.dispatch_batch(batch)
+            except Exception as e:
+                # an appender failure (ENOSPC, short write, ...) must not
+                # kill the drainer: once it dies the bounded queue fills
+                # and every Logger.log producer blocks forever. Report,
+                # drop the batch and keep draining.
+                print(f"AsyncLogDispatcher: dropped batch of {len(batch)}: {e!r}",
+                      file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
 
 class Logger:
-    """Singleton Logger Entry Point"""
-    _instance = None
-    _lock = threading.Lock()
+    """Singleton Logger Entry Point.
+
+    The instance is built once at module import (the import lock makes
+    that safe), so Logger() is just a lock-free attribute read -- no
+    double-checked locking on every call."""
 
     def __new__(cls):
-        with cls._lock:
-            if cls._instance is None:
-                cls._instance = super().__new__(cls)
-                cls._instance.handler_chain = LogHandlerConfiguration.build()
-        return cls._instance
+        return _logger_instance
 
     def log(self, level: LogLevel, message: str):
-        log_msg = LogMessage(level, message)
-        self.handler_chain.handle(log_msg)
+        self.dispatcher.put(LogMessage(level, message))
+
+    def flush(self):
+        self.dispatcher.flush()
+
+_logger_instance = object.__new__(Logger)
+_logger_instance.dispatcher = AsyncLogDispatcher(LogHandlerConfiguration.dispatch_batch)
 
 # --- 6. Main Execution ---
 if __name__ == "__main__":
@@ -165,6 +253,8 @@ if __name__ == "__main__":
 
     print("--- Test INFO ---")
     logger.log(LogLevel.INFO, "System heartbeat is normal.")
+    logger.flush()
 
     print("\n--- Test ERROR ---")
-    logger.log(LogLevel.ERROR, "Database connection failed!")
\ No newline at end of file
+    logger.log(LogLevel.ERROR, "Database connection failed!")
+    logger.flush()
\ No newline at end of file
@@ -1,5 +1,18 @@
 from enum import Enum
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; plain lists back the state instead
+    np = None
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the kernel still runs as pure Python
+    def njit(*args, **kwargs):
+        def wrap(fn):
+            return fn
+        return wrap
+
 class Symbol(Enum):
     X = 1
     O = -1
@@ -10,48 +23,107 @@ class Player:
         self.name = name
         self.symbol = symbol
 
+@njit(cache=True)
+def _apply_move(board, rows, cols, diags, n, row, col, val):
+    # Hot loop for AI self-play/MCTS rollouts: integer increments and
+    # compares over dense arrays, compiled to native code when numba is
+    # available (no per-move Python object allocation). The board is a
+    # flat row-major sequence so lists and ndarrays index the same way.
+    board[row * n + col] = val
+    rows[row] += val
+    cols[col] += val
+
+    if row == col:
+        diags[0] += val
+    if row + col == n - 1:
+        diags[1] += val
+
+    # The mover's sign is known, so only +n (Player X) or -n (Player O)
+    # can complete a line this turn -- compare against that target
+    # directly instead of paying four abs() calls per move
+    target = n if val == 1 else -n
+    if rows[row] == target:
+        return True
+    if cols[col] == target:
+        return True
+    if diags[0] == target:
+        return True
+    if diags[1] == target:
+        return True
+
+    return False
+
 class TicTacToe:
     def __init__(self, n: int):
         self.n = n
         # Instead of a full grid check, we track sums for each row/col
-        self.rows = [0] * n
-        self.cols = [0] * n
-        self.diag = 0
-        self.anti_diag = 0
-        # We still keep a board to prevent playing on the same spot
-        self.board = [[0] * n for _ in range(n)]
+        if np is not None:
+            self.rows = np.zeros(n, dtype=np.int8)
+            self.cols = np.zeros(n, dtype=np.int8)
+            self.diags = np.zeros(2, dtype=np.int8)  # [diag, anti_diag]
+            # We still keep a board to prevent playing on the same spot
+            self.board = np.zeros(n * n, dtype=np.int8)
+        else:
+            self.rows = [0] * n
+            self.cols = [0] * n
+            self.diags = [0, 0]  # [diag, anti_diag]
+            self.board = [0] * (n * n)
 
     def make_move(self, row: int, col: int, player: Player) -> bool:
         # Basic validation
-        if not (0 <= row < self.n and 0 <= col < self.n) or self.board[row][col] != 0:
+        if not (0 <= row < self.n and 0 <= col < self.n) or self.board[row * self.n + col] != 0:
             return False
 
-        # Mark board and get point value (1 or -1)
+        # Mark board, update counters and check for a win in the kernel
         val = player.symbol.value
-        self.board[row][col] = val
+        return bool(_apply_move(self.board, self.rows, self.cols, self.diags,
+                                self.n, row, col, val))
 
-        # Update counters
-        self.rows[row] += val
-        self.cols[col] += val
-        
-        if row == col:
-            self.diag += val
-        if row + col == self.n - 1:
-            self.anti_diag += val
-
-        # Simple check: did any counter reach the board size (n)?
-        # Using abs() handles both +n (Player X) and -n (Player O)
-        # Check if the absolute sum of any line equals N
-        if abs(self.rows[row]) == self.n: 
-            return True
-        if abs(self.cols[col]) == self.n:
-            return True
-        if abs(self.diag) == self.n: 
-            return True
-        if abs(self.anti_diag) == self.n: 
-            return True
-
-        return False
+class BitboardTicTacToe:
+    """Bitboard variant for AI search loops.
+
+    The whole game state is two ints (x_mask, o_mask) with one bit per
+    cell at row * n + col, so a win test is an AND + compare against
+    precomputed line masks and the (x_mask, o_mask) pair doubles as a
+    transposition-table key. Requires n <= 8 so each state fits a uint64.
+    """
+
+    def __init__(self, n: int):
+        if n > 8:
+            raise ValueError("bitboard representation supports n <= 8")
+        self.n = n
+        self.x_mask = 0
+        self.o_mask = 0
+        self.win_lines = self._build_win_lines(n)
+
+    @staticmethod
+    def _build_win_lines(n: int):
+        lines = [sum(1 << (r * n + c) for c in range(n)) for r in range(n)]
+        lines += [sum(1 << (r * n + c) for r in range(n)) for c in range(n)]
+        lines.append(sum(1 << (i * n + i) for i in range(n)))
+        lines.append(sum(1 << (i * n + (n - 1 - i)) for i in range(n)))
+        return lines
+
+    def state_key(self):
+        """Hashable key for transposition tables"""
+        return (self.x_mask, self.o_mask)
+
+    def make_move(self, row: int, col: int, player: Player) -> bool:
+        if not (0 <= row < self.n and 0 <= col < self.n):
+            return False
+        bit = 1 << (row * self.n + col)
+        if (self.x_mask | self.o_mask) & bit:
+            return False
+
+        if player.symbol is Symbol.X:
+            self.x_mask |= bit
+            mask = self.x_mask
+        else:
+            self.o_mask |= bit
+            mask = self.o_mask
+
+        # single AND + compare per line; no counters, no branching on sign
+        return any((mask & line) == line for line in self.win_lines)
 
 # --- Main Method ---
 if __name__ == "__main__":
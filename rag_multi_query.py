@@ -1,21 +1,32 @@
 # --- 1. Installation and Setup ---
 # Ensure you have the required libraries installed.
-# pip install langchain langchain-openai chromadb openai python-dotenv beautifulsoup4
+# pip install langchain langchain-openai chromadb openai python-dotenv beautifulsoup4 "httpx[http2]"
 
+import asyncio
 import os
+import re
+import weakref
+from hashlib import blake2b
 from dotenv import load_dotenv
 from typing import List
 import logging
 
+import httpx
+
 # Import key components from LangChain
 from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.globals import set_llm_cache
+from langchain.storage import LocalFileStore
+from langchain_community.cache import SQLiteCache
 from langchain_community.document_loaders import WebBaseLoader
 from langchain_community.vectorstores import Chroma
+from chromadb.config import Settings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.retrievers.multi_query import MultiQueryRetriever
+from langchain.retrievers.multi_query import DEFAULT_QUERY_PROMPT, MultiQueryRetriever
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
-from langchain_core.output_parsers import StrOutputParser
+from langchain_core.output_parsers import BaseOutputParser, StrOutputParser
 
 # --- 2. Configuration and Environment ---
 
@@ -31,32 +42,103 @@ for var in required_vars:
     if not os.getenv(var):
         raise ValueError(f"{var} is not set in the environment. Please add it to your .env file.")
 
+# Shared HTTP clients for all Azure OpenAI traffic (chat + embeddings):
+# HTTP/2 multiplexing over a keep-alive pool means calls reuse
+# connections instead of paying a TCP/TLS handshake each.
+_http_limits = httpx.Limits(max_keepalive_connections=50, max_connections=100)
+
+class _PerLoopTransport(httpx.AsyncBaseTransport):
+    """Connection pool per running event loop.
+
+    Keep-alive connections are bound to the loop they were opened on; a
+    module-level pool reused after asyncio.run closes that loop fails
+    with "Event loop is closed". Routing each request through a pool
+    owned by the current loop keeps connection reuse within a loop and
+    never across loops.
+    """
+
+    def __init__(self, **pool_kwargs):
+        self._pool_kwargs = pool_kwargs
+        self._pools = weakref.WeakKeyDictionary()
+
+    async def handle_async_request(self, request):
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = httpx.AsyncHTTPTransport(**self._pool_kwargs)
+            self._pools[loop] = pool
+        return await pool.handle_async_request(request)
+
+    async def aclose(self):
+        for pool in self._pools.values():
+            await pool.aclose()
+        self._pools.clear()
+
+http_client = httpx.Client(http2=True, limits=_http_limits, timeout=60.0)
+http_async_client = httpx.AsyncClient(
+    transport=_PerLoopTransport(http2=True, limits=_http_limits),
+    timeout=60.0,
+)
+
 # --- 3. Data Ingestion and Vector Store Preparation ---
 
 # Use a real-world, detailed document for a robust example.
 # Lilian Weng's blog on autonomous agents is an excellent source.
+CHROMA_DIR = "./chroma_db"
+
 try:
-    logging.info("Loading documents from the web...")
-    loader = WebBaseLoader(web_path="https://lilianweng.github.io/posts/2023-06-23-agent/")
-    documents = loader.load()
-    logging.info(f"Successfully loaded {len(documents)} document(s).")
-
-    # Split the document into smaller, manageable chunks for effective retrieval
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    doc_splits = text_splitter.split_documents(documents)
-    logging.info(f"Document split into {len(doc_splits)} chunks.")
-
-    # Create Azure OpenAI embeddings and initialize the Chroma vector store
-    # This process converts text chunks into vectors and stores them for similarity search.
-    logging.info("Creating embeddings and initializing vector store...")
+    # Create Azure OpenAI embeddings (needed for both ingest and reload).
+    # chunk_size=64 batches 64 text chunks per embedding HTTP request
+    # during bulk ingest instead of one call each.
     embedding_function = AzureOpenAIEmbeddings(
         azure_deployment="text-embedding-3-small",  # Replace with your deployment name
         azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
         api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2024-02-15-preview"  # Use appropriate API version
+        api_version="2024-02-15-preview",  # Use appropriate API version
+        chunk_size=64,
+        http_client=http_client,
+        http_async_client=http_async_client
+    )
+    # Cache embeddings on disk so repeated queries (and the retriever's
+    # generated query variants) skip the Azure embedding round trip.
+    embedding_function = CacheBackedEmbeddings.from_bytes_store(
+        embedding_function,
+        LocalFileStore("./emb-cache"),
+        namespace=embedding_function.model,
+        query_embedding_cache=True,
     )
-    vector_store = Chroma.from_documents(documents=doc_splits, embedding=embedding_function)
-    logging.info("Vector store created successfully.")
+    chroma_settings = Settings(anonymized_telemetry=False)
+
+    if os.path.isdir(CHROMA_DIR) and os.listdir(CHROMA_DIR):
+        # Re-embedding and rebuilding the HNSW index is the most expensive
+        # step; mmap-load the persisted index instead on subsequent runs.
+        logging.info(f"Loading persisted vector store from {CHROMA_DIR}...")
+        vector_store = Chroma(
+            persist_directory=CHROMA_DIR,
+            embedding_function=embedding_function,
+            client_settings=chroma_settings,
+        )
+        logging.info("Vector store loaded from disk.")
+    else:
+        logging.info("Loading documents from the web...")
+        loader = WebBaseLoader(web_path="https://lilianweng.github.io/posts/2023-06-23-agent/")
+        documents = loader.load()
+        logging.info(f"Successfully loaded {len(documents)} document(s).")
+
+        # Split the document into smaller, manageable chunks for effective retrieval
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+        doc_splits = text_splitter.split_documents(documents)
+        logging.info(f"Document split into {len(doc_splits)} chunks.")
+
+        logging.info("Creating embeddings and initializing vector store...")
+        vector_store = Chroma.from_documents(
+            documents=doc_splits,
+            embedding=embedding_function,
+            persist_directory=CHROMA_DIR,
+            collection_metadata={"hnsw:space": "cosine", "hnsw:M": 32, "hnsw:construction_ef": 200},
+            client_settings=chroma_settings,
+        )
+        logging.info("Vector store created successfully.")
 
 except Exception as e:
     logging.error(f"Failed during data ingestion or vector store setup: {e}")
@@ -65,6 +147,10 @@ except Exception as e:
 
 # --- 4. The Multi-Query Retriever ---
 
+# Memoize LLM calls (notably the query-variant generation step) so an
+# identical input returns cached variants without an LLM round trip.
+set_llm_cache(SQLiteCache(database_path="./llm-cache.db"))
+
 # Define the LLM to be used for generating query variations
 # Using Azure OpenAI with gpt-4o-mini deployment
 llm = AzureChatOpenAI(
@@ -72,16 +158,52 @@ llm = AzureChatOpenAI(
     azure_deployment="gpt-4.1",  # Replace with your deployment name
     azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
     api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version="2024-02-15-preview"  # Use appropriate API version
+    api_version="2024-02-15-preview",  # Use appropriate API version
+    http_client=http_client,
+    http_async_client=http_async_client
 )
 
 # Set up the MultiQueryRetriever
 # This retriever uses the LLM to generate multiple queries from different perspectives
 # for a given user input. It then retrieves documents for all queries, and combines
 # the unique results.
+# Compiled once at import; scans the whole LLM response in a single pass
+# and strips optional "1." / "2)" list numbering from each variant line.
+_QUERY_LINE_RE = re.compile(r"^\s*(?:\d+[.)]\s*)?(\S.*?)\s*$", re.MULTILINE)
+
+class CompiledQueryLineParser(BaseOutputParser[List[str]]):
+    """Extracts query variants with one precompiled-regex scan over the
+    response instead of a split + per-line strip/filter pass."""
+
+    def parse(self, text: str) -> List[str]:
+        return _QUERY_LINE_RE.findall(text)
+
+class DedupingMultiQueryRetriever(MultiQueryRetriever):
+    """
+    MultiQueryRetriever with content-digest deduplication.
+
+    The base class already fans the generated variants out concurrently
+    with asyncio.gather on the async path, so the retriever must be used
+    via ainvoke to get parallel retrieval; this subclass only replaces
+    the pairwise-comparison dedup of the combined results.
+    """
+
+    def unique_union(self, documents: List) -> List:
+        # Dedup on a 16-byte content digest: O(1) per doc via dict lookup
+        # instead of the default pairwise Document comparisons, which go
+        # quadratic for large k across many variants. The dict also keeps
+        # first-seen ordering.
+        unique = {}
+        for doc in documents:
+            digest = blake2b(doc.page_content.encode(), digest_size=16).digest()
+            if digest not in unique:
+                unique[digest] = doc
+        return list(unique.values())
+
 base_retriever = vector_store.as_retriever(search_kwargs={"k": 3}) # Retrieve top 3 docs per query
-multi_query_retriever = MultiQueryRetriever.from_llm(
-    retriever=base_retriever, llm=llm
+multi_query_retriever = DedupingMultiQueryRetriever(
+    retriever=base_retriever,
+    llm_chain=DEFAULT_QUERY_PROMPT | llm | CompiledQueryLineParser(),
 )
 logging.info("Multi-Query Retriever initialized.")
 
@@ -127,9 +249,75 @@ rag_chain = (
 logging.info("RAG chain constructed.")
 
 
+# --- 5b. Dynamic Micro-Batching for Concurrent Queries ---
+
+class QueryBatcher:
+    """
+    Collects concurrent queries into a single batched chain invocation.
+
+    submit() parks each (question, future) pair on an asyncio.Queue; a
+    background coroutine waits up to max_delay_ms (or until batch_size
+    queries have arrived) and then issues one abatch() call for the whole
+    window, so N concurrent users share one batched LLM round trip
+    instead of N independent ones.
+    """
+
+    def __init__(self, chain, batch_size: int = 8, max_delay_ms: int = 20):
+        self.chain = chain
+        self.batch_size = batch_size
+        self.max_delay = max_delay_ms / 1000.0
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._worker = None
+        self._loop = None
+
+    async def submit(self, question: str) -> str:
+        loop = asyncio.get_running_loop()
+        # The worker task and its queue are bound to the loop they were
+        # created on; restart both if the task died or the caller is on a
+        # different loop (each asyncio.run builds a fresh one), otherwise
+        # submissions would sit on a queue nobody drains.
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self.queue = asyncio.Queue()
+            self._loop = loop
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        await self.queue.put((question, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            questions = [question for question, _ in batch]
+            try:
+                answers = await self.chain.abatch(questions)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), answer in zip(batch, answers):
+                if not future.done():
+                    future.set_result(answer)
+
+# max_concurrency bounds the retriever/LLM fanout inside a batch
+query_batcher = QueryBatcher(rag_chain.with_config(max_concurrency=8))
+logging.info("Query batcher initialized.")
+
+
 # --- 6. Execution and Output ---
 
-def run_query(question: str):
+async def run_query(question: str):
     """
     Executes the RAG chain with a given question and prints the results.
     """
@@ -140,8 +328,9 @@ def run_query(question: str):
     # langchain.debug = True
 
     try:
-        # Invoke the chain to get the final answer
-        final_answer = rag_chain.invoke(question)
+        # Route through the batcher: concurrent callers landing in the
+        # same window share one batched LLM round trip
+        final_answer = await query_batcher.submit(question)
 
         # langchain.debug = False # Disable debug mode after the call
 
@@ -184,14 +373,19 @@ def evaluate_retrieved_context(query: str, documents: List):
 
 
 # --- Main Execution Block ---
-if __name__ == "__main__":
+async def main():
     # Define a somewhat vague or high-level user query that can benefit from rewriting
     original_query = "what are the challenges with LLM-powered autonomous agents?"
 
     # Run the main RAG process
-    run_query(original_query)
+    await run_query(original_query)
 
     # Demonstrate the conceptual evaluation step
     # First, retrieve the documents without synthesizing an answer
-    retrieved_docs = multi_query_retriever.invoke(original_query)
+    retrieved_docs = await multi_query_retriever.ainvoke(original_query)
     evaluate_retrieved_context(original_query, retrieved_docs)
+
+if __name__ == "__main__":
+    # One long-lived event loop for the whole demo: the batcher worker,
+    # the pooled HTTP connections and all queries live on the same loop
+    asyncio.run(main())